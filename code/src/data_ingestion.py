@@ -1,10 +1,11 @@
 import argparse
+import json
 from elasticsearch import Elasticsearch
 import yaml
 from extract_data import extract_data_from_xml, transform_data_to_patent
 from dataclasses import asdict
 from tqdm import tqdm
-from typing import List, Dict
+from typing import List, Dict, Optional
 from parse import parse_args
 
 with open('credentials.yaml', 'r') as file:
@@ -113,7 +114,7 @@ def create_index(config: Dict) -> None:
                                                    mappings=mapping)
 
 
-def upload_document_to_es(config: Dict, document: Dict) -> None:
+def upload_document_to_es(config: Dict, document: Dict) -> bool:
     """
     Uploads a patent document to an Elasticsearch index with optional overwrite behavior.
 
@@ -130,7 +131,8 @@ def upload_document_to_es(config: Dict, document: Dict) -> None:
             like "app_doc_id" and "patent_type" to determine whether to overwrite or add a new document.
 
     Returns:
-        None
+        bool: True if the document was indexed, False if it was skipped because a grant
+        already exists with the same "app_doc_id".
 
     Example:
         config = {
@@ -157,6 +159,7 @@ def upload_document_to_es(config: Dict, document: Dict) -> None:
     # Upload new / Overwride existed grant
     if doc_patent_type == "us-patent-grant":
         es.index(index=config["es_index"], document=document, id=doc_id)
+        return True
     else:
 
         response = es.options(ignore_status=[404]).get(
@@ -171,9 +174,33 @@ def upload_document_to_es(config: Dict, document: Dict) -> None:
         # This prevents an application cannot overwrite a grant
         if is_overwrite or (not response["found"]):
             es.index(index=config["es_index"], document=document, id=doc_id)
+            return True
+
+        return False
+
+
+def record_document(record_file, document: Dict) -> None:
+    """
+    Writes a patent document to a record file as a single JSON line.
+
+    The recorded lines can later be replayed with replay.py to benchmark
+    Elasticsearch without re-parsing the XML data.
+
+    Args:
+        record_file (file object): An open text file the document is written to.
+        document (dict): A dictionary representing the patent document. Dates are
+            written in ISO format, the same way Elasticsearch serializes them.
 
+    Returns:
+        None
+    """
+    record = {"_id": document["app_doc_id"], "_source": document}
+    record_file.write(json.dumps(record, default=str) + "\n")
 
-def ingest_data_to_es(config: Dict, xml_us_patents: List) -> None:
+
+def ingest_data_to_es(config: Dict,
+                      xml_us_patents: List,
+                      record_path: Optional[str] = None) -> None:
     """
     Ingests patent data into Elasticsearch.
 
@@ -188,15 +215,28 @@ def ingest_data_to_es(config: Dict, xml_us_patents: List) -> None:
             - patent_type (str): The type of patent documents, e.g., "grant" or "application".
 
         xml_us_patents (list of str): A list of XML strings, each representing a patent.
+        record_path (str, optional): If given, every document that is actually indexed is
+            written to this file as a JSON line, see record_document. Applications skipped
+            because a grant already exists are not recorded. An existing file is overwritten.
 
     Returns:
         None
 
     """
-    for xml_patent in tqdm(xml_us_patents):
-        patent = transform_data_to_patent(xml_patent=xml_patent,
-                                          patent_type=config["patent_type"])
-        upload_document_to_es(config=config, document=asdict(patent))
+    record_file = open(record_path, 'w') if record_path else None
+
+    try:
+        for xml_patent in tqdm(xml_us_patents):
+            patent = transform_data_to_patent(xml_patent=xml_patent,
+                                              patent_type=config["patent_type"])
+            document = asdict(patent)
+            is_indexed = upload_document_to_es(config=config, document=document)
+
+            if record_file and is_indexed:
+                record_document(record_file, document)
+    finally:
+        if record_file:
+            record_file.close()
 
 
 def main(args: argparse.Namespace) -> None:
@@ -222,7 +262,9 @@ def main(args: argparse.Namespace) -> None:
     xml_us_patents = extract_data_from_xml(file_path=config[fp_key],
                                            patent_type=patent_type)
 
-    ingest_data_to_es(config=config, xml_us_patents=xml_us_patents)
+    ingest_data_to_es(config=config,
+                      xml_us_patents=xml_us_patents,
+                      record_path=args.record_path)
 
 
 if __name__ == '__main__':
@@ -25,8 +25,188 @@ def parse_args() -> argparse.Namespace:
         choices=['application', 'grant'],
         help="Ingesting grant/application data",
     )
-    
+
+    parser.add_argument(
+        "-r",
+        "--record-path",
+        default=None,
+        type=str,
+        help="Record the documents indexed to Elasticsearch into this NDJSON file, overwriting it",
+    )
+
     return parser.parse_args()
 
 
+def positive_int(value: str) -> int:
+    """
+    Argparse type for integers greater than zero.
+    """
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def non_negative_float(value: str) -> float:
+    """
+    Argparse type for floats greater than or equal to zero.
+    """
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} must not be negative")
+    return number
+
 
+def positive_float(value: str) -> float:
+    """
+    Argparse type for floats greater than zero.
+    """
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
+
+
+def parse_replay_args() -> argparse.Namespace:
+    """
+    Parse command-line arguments for replaying recorded documents to Elasticsearch.
+
+    Returns:
+        argparse.Namespace: An object containing parsed command-line arguments.
+
+    The record file is produced by running data_ingestion.py with --record-path.
+    Host and index default to the values in config.yaml when not given. No
+    authentication is used unless --username is given.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay recorded patent documents against Elasticsearch.")
+
+    parser.add_argument(
+        "record_path",
+        type=str,
+        help="NDJSON file recorded by data_ingestion.py --record-path",
+    )
+
+    parser.add_argument(
+        "--es-host",
+        default=None,
+        type=str,
+        help="Elasticsearch endpoint, overrides es_host in config.yaml",
+    )
+
+    parser.add_argument(
+        "--es-index",
+        default=None,
+        type=str,
+        help="Target index, overrides es_index in config.yaml",
+    )
+
+    parser.add_argument(
+        "-u",
+        "--username",
+        default=None,
+        type=str,
+        help="Username for basic authentication",
+    )
+
+    parser.add_argument(
+        "-p",
+        "--password",
+        default=None,
+        type=str,
+        help="Password for basic authentication",
+    )
+
+    parser.add_argument(
+        "--verify-certs",
+        action="store_true",
+        help="Verify the TLS certificate of the endpoint",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        default=30,
+        type=positive_float,
+        help="Request timeout in seconds",
+    )
+
+    parser.add_argument(
+        "--max-retries",
+        default=0,
+        type=int,
+        choices=range(0, 11),
+        metavar="{0..10}",
+        help="Client retries per request, retried time is counted in the latency",
+    )
+
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        default=1,
+        type=positive_int,
+        help="Number of parallel workers sending requests",
+    )
+
+    parser.add_argument(
+        "--rate",
+        default=0,
+        type=non_negative_float,
+        help="Target requests per second across all workers (0 = unlimited)",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        default=1,
+        type=positive_int,
+        help="Documents per request; values above 1 use the bulk API",
+    )
+
+    parser.add_argument(
+        "--repeat",
+        default=1,
+        type=positive_int,
+        help="Number of times to replay the recorded documents",
+    )
+
+    return parser.parse_args()
+
+
+def parse_stub_args() -> argparse.Namespace:
+    """
+    Parse command-line arguments for the Elasticsearch stub server.
+
+    Returns:
+        argparse.Namespace: An object containing parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Minimal Elasticsearch stub that accepts index and bulk requests.")
+
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        type=str,
+        help="Address to listen on",
+    )
+
+    parser.add_argument(
+        "--port",
+        default=9200,
+        type=positive_int,
+        help="Port to listen on",
+    )
+
+    parser.add_argument(
+        "--delay-ms",
+        default=0,
+        type=non_negative_float,
+        help="Artificial delay added to every response, in milliseconds",
+    )
+
+    parser.add_argument(
+        "--reject",
+        action="store_true",
+        help="Reject every document with es_rejected_execution_exception",
+    )
+
+    return parser.parse_args()
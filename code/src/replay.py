@@ -0,0 +1,368 @@
+import argparse
+import json
+import threading
+import time
+import yaml
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from elasticsearch import Elasticsearch
+from typing import List, Dict, Iterator, Optional, Tuple
+from parse import parse_replay_args
+
+
+class RateLimiter:
+    """
+    Hands out evenly spaced send slots shared by several workers so that
+    requests start at `rate` per second. A rate of 0 disables the limit.
+
+    The schedule is fixed when the limiter is created and does not slip when
+    the workers fall behind, so the returned slot is the time the request
+    should have been sent. Measuring latency from the slot includes the time
+    a request waited because earlier ones were slow.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def wait(self) -> float:
+        if not self.interval:
+            return time.perf_counter()
+
+        with self.lock:
+            slot = self.next_slot
+            self.next_slot += self.interval
+
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        return slot
+
+
+class ReplayStats:
+    """
+    Thread-safe collection of the replay results.
+
+    Requests in which every document failed are counted separately and are
+    left out of the latencies, so fast rejections do not improve the
+    percentiles.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.service_times = []
+        self.response_times = []
+        self.requests = 0
+        self.failed_requests = 0
+        self.documents = 0
+        self.failed_documents = 0
+        self.sample_error = None
+
+    def add(self, documents: int, failed: int, error: Optional[str],
+            service_time: float, response_time: float) -> None:
+        with self.lock:
+            self.requests += 1
+            self.documents += documents
+            self.failed_documents += failed
+
+            if error and self.sample_error is None:
+                self.sample_error = error
+
+            if failed == documents:
+                self.failed_requests += 1
+            else:
+                self.service_times.append(service_time)
+                self.response_times.append(response_time)
+
+
+def create_es_client(config: Dict,
+                     username: Optional[str] = None,
+                     password: Optional[str] = None,
+                     verify_certs: bool = False,
+                     timeout: float = 30,
+                     max_retries: int = 0,
+                     connections_per_node: int = 10) -> Elasticsearch:
+    """
+    Creates the Elasticsearch client used for the replay.
+
+    Unlike data_ingestion.get_es_instance, authentication is optional so the
+    replay can target a local stub server, and retries are disabled by
+    default so that they do not hide in the measured latencies.
+
+    The connection pool blocks when all of its connections are in use, so
+    `connections_per_node` must be at least the replay concurrency. Otherwise
+    the extra workers wait for a connection and that wait is measured as
+    service time.
+
+    Args:
+        config (dict): A dictionary containing Elasticsearch configuration options, including:
+            - es_host (str): The Elasticsearch host URL.
+        username (str, optional): Username for basic authentication.
+        password (str, optional): Password for basic authentication.
+        verify_certs (bool): Whether to verify the TLS certificate.
+        timeout (float): Request timeout in seconds.
+        max_retries (int): Number of retries for a failed request.
+        connections_per_node (int): Size of the connection pool.
+
+    Returns:
+        Elasticsearch: An Elasticsearch instance with the specified configuration.
+    """
+    basic_auth = (username, password) if username else None
+
+    return Elasticsearch(config["es_host"],
+                         basic_auth=basic_auth,
+                         verify_certs=verify_certs,
+                         request_timeout=timeout,
+                         max_retries=max_retries,
+                         retry_on_timeout=max_retries > 0,
+                         connections_per_node=connections_per_node)
+
+
+def load_records(record_path: str) -> List[Tuple[str, bytes]]:
+    """
+    Loads the documents recorded by data_ingestion.py --record-path.
+
+    Each document is serialized once here, so the replay does not spend
+    time on JSON encoding while requests are being measured.
+
+    Args:
+        record_path (str): The path to the NDJSON record file.
+
+    Returns:
+        list of tuple: The document id and the serialized document for each record.
+    """
+    records = []
+
+    with open(record_path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            records.append((record["_id"], json.dumps(record["_source"]).encode()))
+
+    return records
+
+
+def iter_batches(records: List[Tuple[str, bytes]], batch_size: int,
+                 repeat: int) -> Iterator[List[Tuple[str, bytes]]]:
+    """
+    Lazily splits the records into request-sized batches, going over the
+    records `repeat` times. A batch never spans two passes, so the last batch
+    of each pass may be smaller than `batch_size`.
+
+    Args:
+        records (list of tuple): The recorded documents, see load_records.
+        batch_size (int): Number of documents per request.
+        repeat (int): Number of times to replay the records.
+
+    Yields:
+        list of tuple: The next batch to be sent.
+    """
+    for _ in range(repeat):
+        for i in range(0, len(records), batch_size):
+            yield records[i:i + batch_size]
+
+
+def build_request_body(batch: List[Tuple[str, bytes]]) -> bytes:
+    """
+    Builds the request body for a batch. A single document is sent as is,
+    larger batches as an NDJSON bulk body without the index name, which is
+    given in the request path instead.
+
+    Args:
+        batch (list of tuple): The document ids and serialized documents.
+
+    Returns:
+        bytes: The serialized request body.
+    """
+    if len(batch) == 1:
+        return batch[0][1]
+
+    lines = []
+    for doc_id, source in batch:
+        lines.append(json.dumps({"index": {"_id": doc_id}}).encode())
+        lines.append(source)
+
+    return b"\n".join(lines) + b"\n"
+
+
+def send_batch(es: Elasticsearch, index: str, batch: List[Tuple[str, bytes]],
+               body: bytes) -> Tuple[int, Optional[str]]:
+    """
+    Sends a pre-serialized batch of documents to Elasticsearch.
+
+    A single document is sent with the index API, the same call
+    data_ingestion.py uses. Larger batches are sent with the bulk API.
+    The client forwards bytes bodies without serializing them again.
+
+    Args:
+        es (Elasticsearch): The Elasticsearch instance.
+        index (str): The name of the target index.
+        batch (list of tuple): The document ids and serialized documents.
+        body (bytes): The request body, see build_request_body.
+
+    Returns:
+        tuple: The number of failed documents and the first error message, or None.
+    """
+    try:
+        if len(batch) == 1:
+            es.index(index=index, document=body, id=batch[0][0])
+            return 0, None
+
+        response = es.bulk(index=index, operations=body)
+        if not response["errors"]:
+            return 0, None
+
+        errors = [
+            item["index"]["error"] for item in response["items"]
+            if "error" in item["index"]
+        ]
+        return len(errors), json.dumps(errors[0]) if errors else None
+    except Exception as e:
+        return len(batch), repr(e)
+
+
+def summarize_latencies(name: str, latencies: List[float]) -> Dict:
+    """
+    Computes the latency percentiles in milliseconds.
+
+    Args:
+        name (str): Prefix of the summary keys, e.g. "service".
+        latencies (list of float): Latencies in seconds.
+
+    Returns:
+        dict: The p50, p90, p95, p99 and max latencies.
+    """
+    if not latencies:
+        return {}
+
+    latencies = np.array(latencies) * 1000
+    summary = {
+        f"{name}_p{p}_ms": float(np.percentile(latencies, p))
+        for p in (50, 90, 95, 99)
+    }
+    summary[f"{name}_max_ms"] = float(latencies.max())
+
+    return summary
+
+
+def replay(es: Elasticsearch, index: str, records: List[Tuple[str, bytes]],
+           concurrency: int = 1, rate: float = 0, batch_size: int = 1,
+           repeat: int = 1) -> Dict:
+    """
+    Replays recorded documents against Elasticsearch and measures throughput
+    and latency.
+
+    Two latencies are reported. The service time is measured from the moment a
+    request is sent. The response time is measured from its scheduled slot
+    when --rate is set, and so also includes the time spent waiting behind
+    slower requests. Without a rate limit both are the same.
+
+    The client must have at least `concurrency` connections, see
+    create_es_client. Batches are produced lazily and at most twice `concurrency` of them are
+    pending at a time, so memory does not grow with `repeat`.
+
+    Args:
+        es (Elasticsearch): The Elasticsearch instance, see create_es_client.
+        index (str): The name of the index where the documents will be uploaded.
+        records (list of tuple): The recorded documents, see load_records.
+        concurrency (int): Number of parallel workers sending requests.
+        rate (float): Target requests per second across all workers, 0 for unlimited.
+        batch_size (int): Documents per request.
+        repeat (int): Number of times to replay the records.
+
+    Returns:
+        dict: A summary with request and document counts, throughput of the
+        indexed documents and latency percentiles in milliseconds.
+    """
+    stats = ReplayStats()
+    pending = threading.BoundedSemaphore(concurrency * 2)
+
+    def worker(batch: List[Tuple[str, bytes]]) -> None:
+        try:
+            body = build_request_body(batch)
+            slot = limiter.wait()
+            sent = time.perf_counter()
+            failed, error = send_batch(es, index, batch, body)
+            done = time.perf_counter()
+            stats.add(len(batch), failed, error, done - sent, done - slot)
+        finally:
+            pending.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        limiter = RateLimiter(rate)
+        start = time.perf_counter()
+
+        for batch in iter_batches(records, batch_size, repeat):
+            pending.acquire()
+            executor.submit(worker, batch)
+
+    elapsed = time.perf_counter() - start
+    indexed = stats.documents - stats.failed_documents
+
+    summary = dict(requests=stats.requests,
+                   failed_requests=stats.failed_requests,
+                   documents=stats.documents,
+                   failed_documents=stats.failed_documents,
+                   elapsed_seconds=elapsed,
+                   requests_per_second=stats.requests / elapsed,
+                   indexed_documents_per_second=indexed / elapsed)
+
+    summary.update(summarize_latencies("service", stats.service_times))
+    summary.update(summarize_latencies("response", stats.response_times))
+
+    if stats.sample_error:
+        summary["sample_error"] = stats.sample_error
+
+    return summary
+
+
+def main(args: argparse.Namespace) -> None:
+
+    config = {"es_host": args.es_host, "es_index": args.es_index}
+
+    if not (args.es_host and args.es_index):
+        print("Loading config...")
+
+        with open('config.yaml', 'r') as file:
+            config.update({
+                key: value
+                for key, value in yaml.safe_load(file).items()
+                if not config.get(key)
+            })
+
+    print("Loading records...")
+
+    records = load_records(args.record_path)
+
+    print(f"Replaying {len(records)} documents to {config['es_host']} "
+          f"index {config['es_index']}")
+
+    es = create_es_client(config=config,
+                          username=args.username,
+                          password=args.password,
+                          verify_certs=args.verify_certs,
+                          timeout=args.timeout,
+                          max_retries=args.max_retries,
+                          connections_per_node=args.concurrency)
+
+    summary = replay(es=es,
+                     index=config["es_index"],
+                     records=records,
+                     concurrency=args.concurrency,
+                     rate=args.rate,
+                     batch_size=args.batch_size,
+                     repeat=args.repeat)
+
+    for key, value in summary.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else
+              f"{key}: {value}")
+
+
+if __name__ == '__main__':
+
+    args = parse_replay_args()
+    main(args)
@@ -0,0 +1,136 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from parse import parse_stub_args
+
+
+REJECTED_ERROR = {
+    "type": "es_rejected_execution_exception",
+    "reason": "rejected execution by the stub server"
+}
+
+
+def bulk_response(body: str, index: str = None, reject: bool = False) -> Dict:
+    """
+    Builds a bulk API response for an NDJSON bulk body.
+
+    Args:
+        body (str): The bulk request body, an action line followed by a source line per document.
+        index (str, optional): The index from the request path, used when an action has no "_index".
+        reject (bool): Whether to reject every document with a 429 error.
+
+    Returns:
+        dict: A bulk response reporting every document as created, or as rejected.
+    """
+    lines = [line for line in body.splitlines() if line.strip()]
+    items = []
+
+    for line in lines[::2]:
+        action = json.loads(line)["index"]
+        item = {"_index": action.get("_index", index), "_id": action.get("_id")}
+
+        if reject:
+            item.update(status=429, error=REJECTED_ERROR)
+        else:
+            item.update(status=201, result="created")
+
+        items.append({"index": item})
+
+    return {"took": 0, "errors": reject, "items": items}
+
+
+def index_response(path: List[str]) -> Dict:
+    """
+    Builds a successful index API response for a /<index>/_doc/<id> path.
+
+    Args:
+        path (list of str): The request path split on "/".
+
+    Returns:
+        dict: An index response reporting the document as created.
+    """
+    return {
+        "_index": path[0],
+        "_id": path[-1],
+        "_version": 1,
+        "result": "created"
+    }
+
+
+def make_handler(delay: float, reject: bool = False) -> type:
+    """
+    Creates a request handler class that accepts index and bulk requests
+    and answers them after `delay` seconds without storing anything.
+
+    Args:
+        delay (float): Artificial delay added to every response, in seconds.
+        reject (bool): Whether to reject every document, as an overloaded cluster does.
+
+    Returns:
+        type: A BaseHTTPRequestHandler subclass.
+    """
+
+    class StubHandler(BaseHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, without this every
+        # response waits for the client's delayed ACK.
+        disable_nagle_algorithm = True
+
+        def send_json(self, status: int, payload: Dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            # The Python client refuses responses without this header.
+            self.send_header("X-Elastic-Product", "Elasticsearch")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def handle_write(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode()
+            path = self.path.split("?")[0].strip("/").split("/")
+
+            if delay:
+                time.sleep(delay)
+
+            if path[-1] == "_bulk":
+                index = path[0] if len(path) == 2 else None
+                self.send_json(200, bulk_response(body, index, reject))
+            elif len(path) == 3 and path[1] == "_doc" and reject:
+                self.send_json(429, {"error": REJECTED_ERROR, "status": 429})
+            elif len(path) == 3 and path[1] == "_doc":
+                self.send_json(201, index_response(path))
+            else:
+                self.send_json(404, {"error": f"unsupported path {self.path}"})
+
+        do_PUT = handle_write
+        do_POST = handle_write
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return StubHandler
+
+
+def main(args: argparse.Namespace) -> None:
+
+    server = ThreadingHTTPServer((args.host, args.port),
+                                 make_handler(args.delay_ms / 1000,
+                                              args.reject))
+
+    print(f"Stub server listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+
+    args = parse_stub_args()
+    main(args)
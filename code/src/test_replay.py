@@ -0,0 +1,204 @@
+import argparse
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer
+from data_ingestion import record_document
+from parse import positive_int, non_negative_float
+from replay import (RateLimiter, ReplayStats, build_request_body,
+                    create_es_client, iter_batches, load_records, replay)
+from stub_server import bulk_response, make_handler
+
+# Run from code/src with: python -m unittest test_replay
+
+
+class TestIterBatches(unittest.TestCase):
+
+    def test_batches_repeat_records_without_spanning_passes(self):
+        records = [{"_id": str(i)} for i in range(5)]
+        batches = list(iter_batches(records, batch_size=2, repeat=2))
+
+        self.assertEqual([len(b) for b in batches], [2, 2, 1, 2, 2, 1])
+        self.assertEqual([r["_id"] for b in batches for r in b],
+                         ["0", "1", "2", "3", "4"] * 2)
+
+    def test_batches_are_produced_lazily(self):
+        batches = iter_batches([{"_id": "0"}], batch_size=1, repeat=10**9)
+        self.assertEqual(next(batches), [{"_id": "0"}])
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_slots_are_evenly_spaced(self):
+        limiter = RateLimiter(rate=50)
+        slots = [limiter.wait() for _ in range(5)]
+
+        for previous, current in zip(slots, slots[1:]):
+            self.assertAlmostEqual(current - previous, 0.02, places=6)
+        self.assertGreaterEqual(time.perf_counter(), slots[-1])
+
+    def test_schedule_does_not_slip_when_behind(self):
+        limiter = RateLimiter(rate=100)
+        first = limiter.wait()
+        time.sleep(0.1)
+
+        self.assertAlmostEqual(limiter.wait() - first, 0.01, places=6)
+
+    def test_unlimited_rate_does_not_wait(self):
+        limiter = RateLimiter(rate=0)
+        slots = [limiter.wait() for _ in range(1000)]
+
+        self.assertEqual(limiter.interval, 0)
+        self.assertEqual(slots, sorted(slots))
+
+
+class TestReplayStats(unittest.TestCase):
+
+    def test_failed_requests_are_left_out_of_latencies(self):
+        stats = ReplayStats()
+        stats.add(10, 0, None, 0.5, 0.6)
+        stats.add(10, 3, "partial", 0.4, 0.4)
+        stats.add(10, 10, "rejected", 0.001, 0.001)
+
+        self.assertEqual(stats.failed_requests, 1)
+        self.assertEqual(stats.failed_documents, 13)
+        self.assertEqual(stats.service_times, [0.5, 0.4])
+        self.assertEqual(stats.sample_error, "partial")
+
+
+class TestRecordDocument(unittest.TestCase):
+
+    def test_round_trip_with_dates(self):
+        document = {
+            "app_doc_id": "12345",
+            "patent_type": "us-patent-grant",
+            "date_applied": datetime.date(2021, 3, 4),
+            "inventors": [{"name": "A"}]
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            record_path = os.path.join(tmp, "records.ndjson")
+            with open(record_path, "w") as f:
+                record_document(f, document)
+                record_document(f, document)
+
+            records = load_records(record_path)
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0][0], "12345")
+        self.assertEqual(json.loads(records[0][1]),
+                         dict(document, date_applied="2021-03-04"))
+
+    def test_record_is_a_single_line(self):
+        record_file = io.StringIO()
+        record_document(record_file, {"app_doc_id": "1", "abstract": "a\nb"})
+
+        self.assertEqual(record_file.getvalue().count("\n"), 1)
+
+
+class TestBuildRequestBody(unittest.TestCase):
+
+    def test_single_document_is_sent_as_is(self):
+        self.assertEqual(build_request_body([("1", b'{"a":1}')]), b'{"a":1}')
+
+    def test_bulk_body_has_action_and_source_lines(self):
+        body = build_request_body([("1", b'{"a":1}'), ("2", b'{"a":2}')])
+        lines = body.decode().splitlines()
+
+        self.assertTrue(body.endswith(b"\n"))
+        self.assertEqual([json.loads(line) for line in lines], [
+            {"index": {"_id": "1"}}, {"a": 1},
+            {"index": {"_id": "2"}}, {"a": 2}
+        ])
+
+
+class TestArgumentTypes(unittest.TestCase):
+
+    def test_invalid_values_are_rejected(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            positive_int("0")
+        with self.assertRaises(argparse.ArgumentTypeError):
+            non_negative_float("-1")
+
+        self.assertEqual(positive_int("3"), 3)
+        self.assertEqual(non_negative_float("0"), 0.0)
+
+
+class TestStubServer(unittest.TestCase):
+
+    def test_bulk_response_reports_every_document(self):
+        body = "\n".join(
+            json.dumps(line) for line in [
+                {"index": {"_index": "bench", "_id": "1"}}, {"a": 1},
+                {"index": {"_index": "bench", "_id": "2"}}, {"a": 2}
+            ]) + "\n"
+        response = bulk_response(body)
+
+        self.assertFalse(response["errors"])
+        self.assertEqual([item["index"]["_id"] for item in response["items"]],
+                         ["1", "2"])
+
+
+class TestReplayAgainstStub(unittest.TestCase):
+
+    def start_stub(self, delay: float, reject: bool = False) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                     make_handler(delay, reject))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def replay_stub(self, host: str, concurrency: int, **kwargs) -> dict:
+        es = create_es_client({"es_host": host},
+                              connections_per_node=concurrency)
+        records = [(str(i), json.dumps({"app_doc_id": str(i)}).encode())
+                   for i in range(200)]
+
+        return replay(es, "bench", records, concurrency=concurrency, **kwargs)
+
+    def test_concurrency_above_default_pool_size(self):
+        # 200 requests of 100 ms take about 1 s with 20 connections, and
+        # about 2 s if the client were capped at its default 10.
+        summary = self.replay_stub(self.start_stub(delay=0.1), concurrency=20)
+
+        self.assertEqual(summary["requests"], 200)
+        self.assertEqual(summary["documents"], 200)
+        self.assertEqual(summary["failed_documents"], 0)
+        self.assertLess(summary["elapsed_seconds"], 1.8)
+        self.assertLess(summary["service_p99_ms"], 500)
+
+    def test_bulk_requests(self):
+        summary = self.replay_stub(self.start_stub(delay=0.01),
+                                   concurrency=2,
+                                   batch_size=50,
+                                   repeat=2)
+
+        self.assertEqual(summary["requests"], 8)
+        self.assertEqual(summary["documents"], 400)
+        self.assertEqual(summary["failed_documents"], 0)
+
+    def test_rejected_requests_are_counted_as_failed(self):
+        host = self.start_stub(delay=0, reject=True)
+
+        for batch_size in (1, 50):
+            summary = self.replay_stub(host,
+                                       concurrency=4,
+                                       batch_size=batch_size)
+
+            self.assertEqual(summary["failed_requests"], summary["requests"])
+            self.assertEqual(summary["failed_documents"], 200)
+            self.assertEqual(summary["indexed_documents_per_second"], 0)
+            self.assertNotIn("service_p50_ms", summary)
+            self.assertIn("es_rejected_execution_exception",
+                          summary["sample_error"])
+
+
+if __name__ == '__main__':
+    unittest.main()